@@ -0,0 +1,99 @@
+"""
+memory_footprint.py
+report the per camera memory kept by the onvif component before and after
+compacting the startup data
+
+Usage: python benchmarks/memory_footprint.py HOST PORT USER PASSWORD [PROFILE]
+"""
+import asyncio
+import gc
+import os
+import sys
+import types
+
+import onvif
+from onvif import ONVIFCamera, exceptions
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from media_profile import OnvifProfile, release_service  # noqa: E402 pylint: disable=wrong-import-position
+
+_SKIPPED = (type, types.ModuleType, types.FunctionType, types.MethodType)
+
+
+def deep_sizeof(*objs):
+    """Return the bytes of objs and everything they reference."""
+    seen = set()
+    size = 0
+    pending = list(objs)
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _SKIPPED):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return size
+
+
+def create_camera(host, port, user, password):
+    """Return an ONVIFCamera as built by the component."""
+    return ONVIFCamera(
+        host, port, user, password, "{}/wsdl/".format(os.path.dirname(onvif.__file__))
+    )
+
+
+def create_ptz(camera):
+    """Build the PTZ client if the camera has one."""
+    try:
+        return camera.create_ptz_service()
+    except exceptions.ONVIFError:
+        return None
+
+
+async def main(host, port, user, password, profile_index=0):
+    """Measure what a camera kept before and what it keeps now."""
+    # Previous setup: the camera object held the media and PTZ clients and the
+    # entity held the whole GetProfiles result.
+    camera = create_camera(host, port, user, password)
+    await camera.update_xaddrs()
+    profiles = await camera.create_media_service().GetProfiles()
+    create_ptz(camera)
+    before = deep_sizeof(camera, profiles)
+    count = len(profiles)
+    del camera, profiles
+
+    # Current setup: only the profile record is kept, the media client is
+    # released and the PTZ client is built on the first PTZ command.
+    camera = create_camera(host, port, user, password)
+    await camera.update_xaddrs()
+    media = camera.create_media_service()
+    profiles = await media.GetProfiles()
+    record = OnvifProfile.from_zeep(profiles[min(profile_index, count - 1)])
+    release_service(camera, "media", media)
+    del media, profiles
+    gc.collect()
+    after = deep_sizeof(camera, record)
+    create_ptz(camera)
+    after_ptz = deep_sizeof(camera, record)
+
+    print("profiles:", count)
+    print("before:          {:>10} bytes per camera".format(before))
+    print("after:           {:>10} bytes per camera ({!r})".format(after, record))
+    print("after PTZ use:   {:>10} bytes per camera".format(after_ptz))
+    print("saved:           {:>10} bytes per camera without PTZ use".format(before - after))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 5:
+        print(__doc__)
+        sys.exit(1)
+    asyncio.get_event_loop().run_until_complete(
+        main(
+            sys.argv[1],
+            int(sys.argv[2]),
+            sys.argv[3],
+            sys.argv[4],
+            int(sys.argv[5]) if len(sys.argv) > 5 else 0,
+        )
+    )
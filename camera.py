@@ -8,10 +8,10 @@ import asyncio
 import datetime as dt
 import logging
 import os
+import time
 
 from aiohttp.client_exceptions import ClientConnectionError, ServerDisconnectedError
 from haffmpeg.camera import CameraMjpeg
-from haffmpeg.tools import IMAGE_JPEG, ImageFrame
 import onvif
 from onvif import ONVIFCamera, exceptions
 import voluptuous as vol
@@ -32,6 +32,7 @@ from homeassistant.const import (
 from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers.aiohttp_client import async_aiohttp_proxy_stream
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 from homeassistant.helpers.service import async_extract_entity_ids
 import homeassistant.util.dt as dt_util
 
@@ -39,12 +40,18 @@ from .const import (
     ABSOLUTE_MOVE,
     ATTR_CONTINUOUS_DURATION,
     ATTR_DISTANCE,
+    ATTR_DURATION,
+    ATTR_FORMAT,
     ATTR_MOVE_MODE,
+    ATTR_MOVES,
+    ATTR_NORMALIZED,
+    ATTR_OUTCOME,
     ATTR_PAN,
     ATTR_PRESET_NAME,
     ATTR_PRESET_OPERATION,
     ATTR_PRESET_TOKEN,
     ATTR_PTZ_VECTOR,
+    ATTR_RESULTS,
     ATTR_SPEED,
     ATTR_SPEED_VECTOR,
     ATTR_TILT,
@@ -52,22 +59,31 @@ from .const import (
     CONF_PROFILE_IDX,
     CONF_RTSP_TRANSPORT,
     CONF_CONTINUOUS_TIMEOUT_COMPLIANCE,
+    CONF_SNAPSHOT_CACHE_SIZE,
+    CONF_SNAPSHOT_REFRESH_INTERVAL,
+    CONF_TRACING,
     CONTINUOUS_MOVE,
     DEFAULT_ARGUMENTS,
     DEFAULT_NAME,
     DEFAULT_PASSWORD,
     DEFAULT_PORT,
+    DEFAULT_PROFILE_DURATION,
     DEFAULT_PROFILE_IDX,
+    DEFAULT_SNAPSHOT_CACHE_SIZE,
     DEFAULT_USERNAME,
     DIR_DOWN,
     DIR_LEFT,
     DIR_RIGHT,
     DIR_UP,
     ENTITIES,
+    EVENT_PTZ_BATCH_MOVE,
     GET_PRESETS,
     GOTO_HOME,
     GOTO_PRESET,
     ONVIF_DATA,
+    OUTCOME_FAILED,
+    OUTCOME_NOT_FOUND,
+    OUTCOME_OK,
     PTZ_NONE,
     RELATIVE_MOVE,
     RTSP_TRANSPORT_HTTP,
@@ -76,13 +92,24 @@ from .const import (
     SERVICE_ONVIF_CMD_REBOOT,
     SERVICE_PTZ_MOVE,
     SERVICE_PTZ_ADVANCED_MOVE,
+    SERVICE_PTZ_BATCH_MOVE,
     SERVICE_PTZ_PRESET,
+    SERVICE_PROFILE,
+    SERVICE_TRACE_EXPORT,
     SET_HOME,
     SET_PRESET,
+    SNAPSHOT_IDLE_TIMEOUT,
     STOP_MOVE,
+    TRACE_FORMAT_CHROME,
+    TRACE_FORMAT_JSON,
     ZOOM_IN,
     ZOOM_OUT,
 )
+from .media_profile import OnvifProfile, release_service
+from .ptz import PtzRanges
+from .snapshot import get_snapshot_cache
+from .snapshot_queue import get_snapshot_queue
+from .tracing import get_tracer, traced, write_file
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -103,6 +130,11 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
             vol.Coerce(int), vol.Range(min=0)
         ),
         vol.Optional(CONF_CONTINUOUS_TIMEOUT_COMPLIANCE, default=True): cv.boolean,
+        vol.Optional(CONF_SNAPSHOT_REFRESH_INTERVAL): cv.positive_time_period,
+        vol.Optional(
+            CONF_SNAPSHOT_CACHE_SIZE, default=DEFAULT_SNAPSHOT_CACHE_SIZE
+        ): cv.positive_int,
+        vol.Optional(CONF_TRACING, default=False): cv.boolean,
     }
 )
 
@@ -134,7 +166,60 @@ SERVICE_PTZ_ADVANCED_MOVE_SCHEMA = vol.Schema(
         vol.Optional(ATTR_SPEED_VECTOR, default=("1.0", "1.0", "1.0")): vol.All(
             vol.ExactSequence((cv.string, cv.string, cv.string)), vol.Coerce(tuple)
         ),
-        vol.Optional(ATTR_CONTINUOUS_DURATION, default=0): cv.small_float
+        vol.Optional(ATTR_CONTINUOUS_DURATION, default=0): cv.small_float,
+        vol.Optional(ATTR_NORMALIZED, default=False): cv.boolean,
+    }
+)
+
+
+def _require_ptz_vector(move):
+    """Require ptz_vector in a batch move unless it is a Stop."""
+    if move[ATTR_MOVE_MODE] != STOP_MOVE and ATTR_PTZ_VECTOR not in move:
+        raise vol.Invalid(
+            "ptz_vector is required for {} of {}".format(
+                move[ATTR_MOVE_MODE], move[ATTR_ENTITY_ID]
+            )
+        )
+    return move
+
+
+def _unique_entity_ids(moves):
+    """Reject batches moving the same camera more than once."""
+    seen = set()
+    for move in moves:
+        if move[ATTR_ENTITY_ID] in seen:
+            raise vol.Invalid(
+                "{} appears more than once in the batch".format(move[ATTR_ENTITY_ID])
+            )
+        seen.add(move[ATTR_ENTITY_ID])
+    return moves
+
+
+PTZ_BATCH_MOVE_ITEM_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+        vol.Required(ATTR_MOVE_MODE): vol.In(
+            [CONTINUOUS_MOVE, RELATIVE_MOVE, ABSOLUTE_MOVE, STOP_MOVE]
+        ),
+        vol.Optional(ATTR_PTZ_VECTOR): vol.All(
+            vol.ExactSequence((cv.string, cv.string, cv.string)), vol.Coerce(tuple)
+        ),
+        vol.Optional(ATTR_SPEED_VECTOR, default=("1.0", "1.0", "1.0")): vol.All(
+            vol.ExactSequence((cv.string, cv.string, cv.string)), vol.Coerce(tuple)
+        ),
+        vol.Optional(ATTR_CONTINUOUS_DURATION, default=0): cv.small_float,
+        vol.Optional(ATTR_NORMALIZED, default=False): cv.boolean,
+    }
+)
+
+SERVICE_PTZ_BATCH_MOVE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_MOVES): vol.All(
+            cv.ensure_list,
+            vol.Length(min=1),
+            [vol.All(PTZ_BATCH_MOVE_ITEM_SCHEMA, _require_ptz_vector)],
+            _unique_entity_ids,
+        ),
     }
 )
 
@@ -151,10 +236,27 @@ SERVICE_PTZ_PRESET_SCHEMA = vol.Schema(
 
 SERVICE_ONVIF_REBOOT_SCHEMA = vol.Schema({ATTR_ENTITY_ID: cv.entity_ids})
 
+SERVICE_TRACE_EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_FORMAT, default=TRACE_FORMAT_CHROME): vol.In(
+            [TRACE_FORMAT_JSON, TRACE_FORMAT_CHROME]
+        ),
+    }
+)
+
+SERVICE_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=DEFAULT_PROFILE_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=300)
+        ),
+    }
+)
+
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up a ONVIF camera."""
     _LOGGER.debug("Setting up the ONVIF camera platform")
+    tracer = get_tracer(hass, config[CONF_TRACING])
 
     async def async_handle_ptz_move(service):
         """Handle PTZ Move service call."""
@@ -183,6 +285,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         speed_vector = service.data[ATTR_SPEED_VECTOR]
         move_mode = service.data[ATTR_MOVE_MODE]
         continuous_timeout = service.data[ATTR_CONTINUOUS_DURATION]
+        normalized = service.data[ATTR_NORMALIZED]
         timeout_compliance = config[CONF_CONTINUOUS_TIMEOUT_COMPLIANCE]
         all_cameras = hass.data[ONVIF_DATA][ENTITIES]
         entity_ids = service.data[ATTR_ENTITY_ID]
@@ -192,9 +295,67 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         ]
         for camera in target_cameras:
             await camera.async_perform_ptz_advanced_move(
-                ptz_vector, speed_vector, move_mode, continuous_timeout,timeout_compliance
+                ptz_vector, speed_vector, move_mode, continuous_timeout,timeout_compliance, normalized
             )
 
+    async def async_handle_ptz_batch_move(service):
+        """Handle PTZ Batch Move service call."""
+        moves = service.data[ATTR_MOVES]
+        timeout_compliance = config[CONF_CONTINUOUS_TIMEOUT_COMPLIANCE]
+        all_cameras = {
+            camera.entity_id: camera for camera in hass.data[ONVIF_DATA][ENTITIES]
+        }
+
+        async def async_move(move):
+            camera = all_cameras.get(move[ATTR_ENTITY_ID])
+            if camera is None:
+                return OUTCOME_NOT_FOUND
+            moved = await camera.async_perform_ptz_advanced_move(
+                move.get(ATTR_PTZ_VECTOR, ("0", "0", "0")),
+                move[ATTR_SPEED_VECTOR],
+                move[ATTR_MOVE_MODE],
+                move[ATTR_CONTINUOUS_DURATION],
+                timeout_compliance,
+                move[ATTR_NORMALIZED],
+            )
+            return OUTCOME_OK if moved else OUTCOME_FAILED
+
+        # PTZ services and ranges are resolved for every camera first, then
+        # all requests are dispatched together so the cameras start moving
+        # as close to each other as possible.
+        with tracer.span(None, "ptz_batch_move"):
+            await asyncio.gather(
+                *(
+                    all_cameras[move[ATTR_ENTITY_ID]].async_prepare_ptz()
+                    for move in moves
+                    if move[ATTR_ENTITY_ID] in all_cameras
+                ),
+                return_exceptions=True,
+            )
+            outcomes = await asyncio.gather(
+                *(async_move(move) for move in moves), return_exceptions=True
+            )
+
+        results = []
+        for move, outcome in zip(moves, outcomes):
+            if isinstance(outcome, Exception):
+                _LOGGER.error(
+                    "PTZ batch move on '%s' failed. Error: %s",
+                    move[ATTR_ENTITY_ID],
+                    outcome,
+                )
+                outcome = OUTCOME_FAILED
+            results.append(
+                {
+                    ATTR_ENTITY_ID: move[ATTR_ENTITY_ID],
+                    ATTR_MOVE_MODE: move[ATTR_MOVE_MODE],
+                    ATTR_OUTCOME: outcome,
+                }
+            )
+
+        _LOGGER.debug("PTZ batch move results: %s", results)
+        hass.bus.async_fire(EVENT_PTZ_BATCH_MOVE, {ATTR_RESULTS: results})
+
     async def async_handle_ptz_preset(service):
         """Handle PTZ Preset service call."""
         preset_operation = service.data[ATTR_PRESET_OPERATION]
@@ -222,6 +383,25 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         for camera in target_cameras:
             await camera.async_perform_reboot()
 
+    async def async_handle_trace_export(service):
+        """Handle ONVIF Trace Export service call."""
+        trace_format = service.data[ATTR_FORMAT]
+        path = hass.config.path("onvif_trace_{}.json".format(trace_format))
+        await hass.async_add_executor_job(write_file, path, tracer.export(trace_format))
+        pn.create(hass, "Trace written to {}".format(path), title="Onvif Trace")
+
+    async def async_handle_profile(service):
+        """Handle ONVIF Profile service call."""
+        profiler = await tracer.async_profile(service.data[ATTR_DURATION])
+        if profiler is None:
+            _LOGGER.warning("An ONVIF profile capture is already running")
+            return
+        path = hass.config.path("onvif_profile.prof")
+        summary = await hass.async_add_executor_job(
+            tracer.format_profile, profiler, path
+        )
+        pn.create(hass, "```\n{}\n```".format(summary), title="Onvif Profile")
+
     hass.services.async_register(
         DOMAIN, SERVICE_PTZ_MOVE, async_handle_ptz_move, schema=SERVICE_PTZ_MOVE_SCHEMA
     )
@@ -229,6 +409,12 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     hass.services.async_register(
         DOMAIN, SERVICE_PTZ_ADVANCED_MOVE, async_handle_ptz_advanced_move, schema=SERVICE_PTZ_ADVANCED_MOVE_SCHEMA
     )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PTZ_BATCH_MOVE,
+        async_handle_ptz_batch_move,
+        schema=SERVICE_PTZ_BATCH_MOVE_SCHEMA,
+    )
     hass.services.async_register(
         DOMAIN,
         SERVICE_PTZ_PRESET,
@@ -241,12 +427,26 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         async_handle_reboot,
         schema=SERVICE_ONVIF_REBOOT_SCHEMA,
     )
+    if tracer.enabled:
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_TRACE_EXPORT,
+            async_handle_trace_export,
+            schema=SERVICE_TRACE_EXPORT_SCHEMA,
+        )
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_PROFILE,
+            async_handle_profile,
+            schema=SERVICE_PROFILE_SCHEMA,
+        )
 
     _LOGGER.debug("Constructing the ONVIFHassCamera")
 
-    hass_camera = ONVIFHassCamera(hass, config)
+    with tracer.span(config[CONF_NAME], "setup_platform"):
+        hass_camera = ONVIFHassCamera(hass, config)
 
-    await hass_camera.async_initialize()
+        await hass_camera.async_initialize()
 
     async_add_entities([hass_camera])
     return
@@ -258,6 +458,8 @@ class ONVIFHassCamera(Camera):
     def __init__(self, hass, config):
         """Initialize an ONVIF camera."""
         super().__init__()
+        # Set before the entity is added, services are created during setup.
+        self.hass = hass
 
         _LOGGER.debug("Importing dependencies")
 
@@ -271,15 +473,21 @@ class ONVIFHassCamera(Camera):
         self._ffmpeg_arguments = config.get(CONF_EXTRA_ARGUMENTS)
         self._profile_index = config.get(CONF_PROFILE_IDX)
         self._rtsp_transport = config.get(CONF_RTSP_TRANSPORT)
+        self._tracer = get_tracer(hass)
+        self._snapshot_refresh_interval = config.get(CONF_SNAPSHOT_REFRESH_INTERVAL)
+        self._snapshot_cache_size = config.get(CONF_SNAPSHOT_CACHE_SIZE)
+        self._snapshot_cache = None
+        self._snapshot_unsub = None
+        self._snapshot_refreshing = False
+        self._snapshot_last_request = None
         self._media_service = None
-        self._ptz_service = None
-        self._image_service = None
+        self._services = {}
+        self._services_lock = asyncio.Lock()
         self._input_uri = None
-        self._input_uri_for_log = None
-        self._profile_token = None
-        self._profiles = None
-        self._ptz_opt = None
-        self._ptz_presets = None
+        self._profile = None
+        self._ptz_ranges = None
+        self._ptz_ranges_loaded = False
+        self._ptz_ranges_lock = asyncio.Lock()
 
         _LOGGER.debug(
             "Setting up the ONVIF camera device @ '%s:%s'", self._host, self._port
@@ -293,12 +501,15 @@ class ONVIFHassCamera(Camera):
             "{}/wsdl/".format(os.path.dirname(onvif.__file__)),
         )
 
+    @traced("initialize")
     async def async_initialize(self):
         """
         Initialize the camera.
 
         Initializes the camera by obtaining the input uri and connecting to
-        the camera. Also retrieves the ONVIF profiles.
+        the camera. Also retrieves the ONVIF profiles, only a compact record of
+        the selected one is kept and the media service is released. Returns
+        True once the stream uri is known.
         """
         try:
             _LOGGER.debug("Updating service addresses")
@@ -306,10 +517,16 @@ class ONVIFHassCamera(Camera):
             await self.async_check_date_and_time()
 
             self._media_service = await self.async_obtain_media_service()
-            self._profiles = await self.async_obtain_profiles()
-            self._profile_token = self.index_to_profile_token()
+            self._profile = self.index_to_profile(await self.async_obtain_profiles())
+            if self._profile is None:
+                return False
             await self.async_obtain_input_uri()
-            self._ptz_service = await self.async_obtain_ptz_service()
+            _LOGGER.debug(
+                "Camera '%s' reports PTZ capability: %s",
+                self._name,
+                self.service_available("ptz"),
+            )
+            return self._input_uri is not None
 
         except ClientConnectionError as err:
             _LOGGER.warning(
@@ -325,11 +542,16 @@ class ONVIFHassCamera(Camera):
                 self._name,
                 err,
             )
+            return False
+        finally:
+            release_service(self._camera, "media", self._media_service)
+            self._media_service = None
 
     async def async_check_date_and_time(self):
         """Warns if camera and system date not synced."""
-        _LOGGER.debug("Setting up the ONVIF device management service")
-        devicemgmt = self._camera.create_devicemgmt_service()
+        devicemgmt = await self.async_get_service("devicemgmt")
+        if devicemgmt is None:
+            return
 
         _LOGGER.debug("Retrieving current camera date/time")
         try:
@@ -421,9 +643,12 @@ class ONVIFHassCamera(Camera):
             )
             return None
 
-    def index_to_profile_token(self):
-        """Return token name from a index over profiles object."""
-        if self._profile_index >= len(self._profiles):
+    def index_to_profile(self, profiles):
+        """Return a compact record of the profile at the configured index."""
+        if not profiles:
+            return None
+
+        if self._profile_index >= len(profiles):
             _LOGGER.warning(
                 "ONVIF Camera '%s' doesn't provide profile %d."
                 " Using the last profile.",
@@ -433,7 +658,7 @@ class ONVIFHassCamera(Camera):
             self._profile_index = -1
 
         _LOGGER.debug("Using profile index '%d'", self._profile_index)
-        return self._profiles[self._profile_index].token
+        return OnvifProfile.from_zeep(profiles[self._profile_index])
 
     async def async_obtain_input_uri(self):
         """Set the input uri for the camera."""
@@ -444,7 +669,7 @@ class ONVIFHassCamera(Camera):
         for i in range(0, 2):
             try:
                 req = self._media_service.create_type("GetStreamUri")
-                req.ProfileToken = self._profile_token
+                req.ProfileToken = self._profile.token
                 req.StreamSetup = {
                     "Stream": "RTP-Unicast",
                     "Transport": {"Protocol": self._rtsp_transport},
@@ -452,9 +677,7 @@ class ONVIFHassCamera(Camera):
 
                 stream_uri = await self._media_service.GetStreamUri(req)
                 uri_no_auth = stream_uri.Uri
-                self._input_uri_for_log = uri_no_auth.replace(
-                    "rtsp://", "rtsp://<user>:<password>@", 1
-                )
+                self._profile.stream_uri = uri_no_auth
 
                 self._input_uri = uri_no_auth.replace(
                     "rtsp://", "rtsp://%s:%s@" % (self._username, self._password), 1
@@ -463,7 +686,7 @@ class ONVIFHassCamera(Camera):
                 _LOGGER.debug(
                     "ONVIF Camera Using the following URL for %s: %s",
                     self._name,
-                    self._input_uri_for_log,
+                    uri_no_auth.replace("rtsp://", "rtsp://<user>:<password>@", 1),
                 )
                 break
             except ClientConnectionError as err:
@@ -481,15 +704,101 @@ class ONVIFHassCamera(Camera):
                     )
                     return (None, None)
 
-    async def async_obtain_ptz_service(self):
-        """Set up PTZ service if available."""
-        _LOGGER.debug("Setting up the ONVIF PTZ service")
-        if self._camera.get_service("ptz") is None:
-            _LOGGER.debug("PTZ is not available")
-            return None
-        else:
-            _LOGGER.debug("Completed set up of the ONVIF camera component")
-            return self._camera.create_ptz_service()
+    def service_available(self, name):
+        """Return True if the camera advertises service name in its xaddrs."""
+        try:
+            self._camera.get_definition(name)
+        except exceptions.ONVIFError:
+            return False
+        return True
+
+    async def async_get_service(self, name):
+        """
+        Return the ONVIF service client name, creating it on first use.
+
+        Services are only built when a command needs them, so cameras that
+        never receive a PTZ or device management call don't pay for the WSDL
+        parsing. Returns None if the camera doesn't provide the service.
+        """
+        if name in self._services:
+            return self._services[name]
+
+        async with self._services_lock:
+            if name not in self._services:
+                service = None
+                if self.service_available(name):
+                    _LOGGER.debug(
+                        "Setting up the ONVIF %s service for camera '%s'",
+                        name,
+                        self._name,
+                    )
+                    try:
+                        # Building the client parses the WSDL, keep it off
+                        # the event loop.
+                        service = await self.hass.async_add_executor_job(
+                            self._camera.get_service, name
+                        )
+                    except exceptions.ONVIFError as err:
+                        _LOGGER.error(
+                            "Couldn't create %s service of camera '%s'. Error: %s",
+                            name,
+                            self._name,
+                            err,
+                        )
+                else:
+                    _LOGGER.debug(
+                        "Camera '%s' doesn't provide the %s service", self._name, name
+                    )
+                self._services[name] = service
+
+        return self._services[name]
+
+    async def async_get_ptz_ranges(self, ptz_service):
+        """
+        Return the PTZ ranges of the profile, fetched once and cached.
+
+        Returns None if the camera doesn't answer GetConfigurationOptions,
+        moves are then sent without local checks.
+        """
+        if self._ptz_ranges_loaded:
+            return self._ptz_ranges
+
+        async with self._ptz_ranges_lock:
+            if not self._ptz_ranges_loaded:
+                # Whatever happens the fetch isn't retried, moves are then
+                # sent unchecked like before.
+                self._ptz_ranges_loaded = True
+                if self._profile.ptz_token is not None:
+                    try:
+                        req = ptz_service.create_type("GetConfigurationOptions")
+                        req.ConfigurationToken = self._profile.ptz_token
+                        options = await ptz_service.GetConfigurationOptions(req)
+                        self._ptz_ranges = PtzRanges.from_zeep(options, self._profile)
+                        _LOGGER.debug(
+                            "Camera '%s' PTZ spaces: %s | Speed: %s",
+                            self._name,
+                            self._ptz_ranges.spaces,
+                            self._ptz_ranges.speed,
+                        )
+                    except (
+                        exceptions.ONVIFError,
+                        Fault,
+                        ClientConnectionError,
+                        asyncio.TimeoutError,
+                    ) as err:
+                        _LOGGER.debug(
+                            "Couldn't retrieve PTZ ranges of camera '%s'. Error: %s",
+                            self._name,
+                            err,
+                        )
+
+        return self._ptz_ranges
+
+    async def async_prepare_ptz(self):
+        """Create the PTZ service and fetch its ranges ahead of a move."""
+        ptz_service = await self.async_get_service("ptz")
+        if ptz_service is not None and self._profile is not None:
+            await self.async_get_ptz_ranges(ptz_service)
 
     async def async_perform_ptz_move(
         self, pan, tilt, zoom, distance, speed, move_mode, continuous_timeout, timeout_compliance
@@ -508,21 +817,55 @@ class ONVIFHassCamera(Camera):
         await self.async_perform_ptz_advanced_move( (pan_val, tilt_val, zoom_val), (speed_val,speed_val,speed_val),move_mode,continuous_timeout,timeout_compliance )
 
 
+    @traced("ptz_move")
     async def async_perform_ptz_advanced_move(
-        self, ptz_vector, speed_vector, move_mode, continuous_timeout, timeout_compliance
+        self, ptz_vector, speed_vector, move_mode, continuous_timeout, timeout_compliance, normalized=False
     ):
-        """Perform a PTZ action on the camera."""
+        """
+        Perform a PTZ action on the camera, return True if it was accepted.
+
+        Vectors are checked against the camera PTZ ranges before anything is
+        sent, out of range values are clamped and unsupported move modes are
+        rejected. With normalized, ptz_vector is given in [-1, 1] and mapped
+        onto the camera ranges.
+        """
         _LOGGER.debug("async_perform_ptz_advanced_move")
-        if self._ptz_service is None:
+        ptz_service = await self.async_get_service("ptz")
+        if ptz_service is None or self._profile is None:
             _LOGGER.warning(
                 "PTZ Move actions are not supported on camera '%s'", self._name
             )
-            return
+            return False
 
-        if self._ptz_service:
-            pan_val = float(ptz_vector[0])
-            tilt_val = float(ptz_vector[1])
-            zoom_val = float(ptz_vector[2])
+        if ptz_service:
+            vector = tuple(float(value) for value in ptz_vector)
+            speed_vector = tuple(float(value) for value in speed_vector)
+
+            ptz_ranges = await self.async_get_ptz_ranges(ptz_service)
+            if ptz_ranges is not None:
+                if not ptz_ranges.supports(move_mode):
+                    _LOGGER.warning(
+                        "PTZ %s is not supported on camera '%s'", move_mode, self._name
+                    )
+                    return False
+                fitted = ptz_ranges.apply(move_mode, vector, normalized)
+                if not normalized and fitted != vector:
+                    _LOGGER.warning(
+                        "PTZ vector %s is out of camera '%s' %s range, using %s",
+                        vector,
+                        self._name,
+                        move_mode,
+                        fitted,
+                    )
+                vector = fitted
+                speed_vector = ptz_ranges.apply_speed(speed_vector)
+            elif normalized:
+                _LOGGER.warning(
+                    "PTZ ranges of camera '%s' are unknown, sending normalized vector as is",
+                    self._name,
+                )
+
+            pan_val, tilt_val, zoom_val = vector
             _LOGGER.debug(
                 "Calling %s PTZ Move on camera '%s'| Pan = %4.2f | Tilt = %4.2f | Zoom = %4.2f | Speed = %s | Timeout = %1.1f",
                 move_mode,
@@ -534,8 +877,8 @@ class ONVIFHassCamera(Camera):
                 continuous_timeout
             )
             try:
-                req = self._ptz_service.create_type(move_mode)
-                req.ProfileToken = self._profile_token
+                req = ptz_service.create_type(move_mode)
+                req.ProfileToken = self._profile.token
 
                 if move_mode == CONTINUOUS_MOVE:
                     req.Velocity = {
@@ -544,17 +887,17 @@ class ONVIFHassCamera(Camera):
                     }
                     if continuous_timeout != 0:
                         req.Timeout = dt.timedelta(0, 0, continuous_timeout * 1000000)
-                    await self._ptz_service.ContinuousMove(req)
+                    await ptz_service.ContinuousMove(req)
                     if continuous_timeout != 0 and not timeout_compliance:
                         await asyncio.sleep(continuous_timeout)
-                        req = self._ptz_service.create_type("Stop")
-                        req.ProfileToken = self._profile_token
-                        await self._ptz_service.Stop(req)
+                        req = ptz_service.create_type("Stop")
+                        req.ProfileToken = self._profile.token
+                        await ptz_service.Stop(req)
 
                 elif move_mode == STOP_MOVE:
-                    req = self._ptz_service.create_type("Stop")
-                    req.ProfileToken = self._profile_token
-                    await self._ptz_service.Stop(req)
+                    req = ptz_service.create_type("Stop")
+                    req.ProfileToken = self._profile.token
+                    await ptz_service.Stop(req)
 
                 elif move_mode == RELATIVE_MOVE:
                     req.Translation = {
@@ -562,10 +905,10 @@ class ONVIFHassCamera(Camera):
                         "Zoom": {"x": zoom_val},
                     }
                     req.Speed = {
-                        "PanTilt": {"x": float(speed_vector[0]), "y": float(speed_vector[1])},
-                        "Zoom": {"x": float(speed_vector[2])},
+                        "PanTilt": {"x": speed_vector[0], "y": speed_vector[1]},
+                        "Zoom": {"x": speed_vector[2]},
                     }
-                    await self._ptz_service.RelativeMove(req)
+                    await ptz_service.RelativeMove(req)
 
                 elif move_mode == ABSOLUTE_MOVE:
                     req.Position = {
@@ -573,24 +916,31 @@ class ONVIFHassCamera(Camera):
                         "Zoom": {"x": zoom_val},
                     }
                     req.Speed = {
-                        "PanTilt": {"x": float(speed_vector[0]), "y": float(speed_vector[1])},
-                        "Zoom": {"x": float(speed_vector[2])},
+                        "PanTilt": {"x": speed_vector[0], "y": speed_vector[1]},
+                        "Zoom": {"x": speed_vector[2]},
                     }
-                    await self._ptz_service.AbsoluteMove(req)
+                    await ptz_service.AbsoluteMove(req)
+
+                return True
 
-            except exceptions.ONVIFError as err:
-                if "Bad Request" in err.reason:
-                    self._ptz_service = None
-                    _LOGGER.debug("Camera '%s' doesn't support PTZ.", self._name)
+            except (exceptions.ONVIFError, Fault) as err:
+                # Vectors are checked locally, so a fault doesn't mean PTZ is
+                # unsupported and the service is kept for later moves.
+                _LOGGER.error(
+                    "Camera '%s' PTZ %s failed. Error: %s", self._name, move_mode, err
+                )
         else:
             _LOGGER.debug("Camera '%s' doesn't support PTZ.", self._name)
+        return False
 
 
+    @traced("ptz_preset")
     async def async_perform_ptz_preset(
         self, preset_operation, preset_name, preset_token
     ):
-        """Perform a PTZ Preset action on the camera."""
-        if self._ptz_service:
+        """Perform a PTZ Preset action on the camera, return True on success."""
+        ptz_service = await self.async_get_service("ptz")
+        if ptz_service and self._profile is not None:
             if preset_operation in (
                 GOTO_HOME,
                 SET_HOME,
@@ -600,9 +950,9 @@ class ONVIFHassCamera(Camera):
             ):
                 try:
                     _LOGGER.debug("Retrieved PTZ presets")
-                    req = self._ptz_service.create_type(GET_PRESETS)
-                    req.ProfileToken = self._profile_token
-                    __presets = await self._ptz_service.GetPresets(req)
+                    req = ptz_service.create_type(GET_PRESETS)
+                    req.ProfileToken = self._profile.token
+                    __presets = await ptz_service.GetPresets(req)
 
                     _LOGGER.debug(
                         "Calling PTZ preset| Operation = %s | PresetName = %s | PresetToken = %s",
@@ -611,8 +961,8 @@ class ONVIFHassCamera(Camera):
                         preset_token,
                     )
 
-                    req = self._ptz_service.create_type(preset_operation)
-                    req.ProfileToken = self._profile_token
+                    req = ptz_service.create_type(preset_operation)
+                    req.ProfileToken = self._profile.token
 
                     if preset_operation == GOTO_PRESET:
                         preset_token = next(
@@ -633,12 +983,12 @@ class ONVIFHassCamera(Camera):
                             "PanTilt": {"x": 1.0, "y": 1.0},
                             "Zoom": {"x": 1.0},
                         }
-                        await self._ptz_service.GotoPreset(req)
+                        await ptz_service.GotoPreset(req)
 
                     if preset_operation == SET_PRESET:
                         req.PresetToken = preset_token
                         req.PresetName = preset_name
-                        await self._ptz_service.SetPreset(req)
+                        await ptz_service.SetPreset(req)
 
                     if preset_operation == GET_PRESETS:
                         presets = []
@@ -648,10 +998,12 @@ class ONVIFHassCamera(Camera):
                         pn.create(self.hass, "\n".join(presets), title="Onvif PTZ Presets")
 
                     if preset_operation == GOTO_HOME:
-                        await self._ptz_service.GotoHomePosition(req)
+                        await ptz_service.GotoHomePosition(req)
 
                     if preset_operation == SET_HOME:
-                        await self._ptz_service.SetHomePosition(req)
+                        await ptz_service.SetHomePosition(req)
+
+                    return True
 
                 except exceptions.ONVIFError as err:
                     if "Bad Request" in err.reason:
@@ -670,15 +1022,20 @@ class ONVIFHassCamera(Camera):
             else:
                 _LOGGER.debug("PTZ %s operation is not implemented", preset_operation)
         else:
-            self._ptz_service = None
             _LOGGER.debug("Camera '%s' doesn't support PTZ.", self._name)
+        return False
 
+    @traced("reboot")
     async def async_perform_reboot(self):
-        """Perform a SystemReboot action on the camera."""
+        """Perform a SystemReboot action on the camera, return True on success."""
+        devicemgmt = await self.async_get_service("devicemgmt")
+        if devicemgmt is None:
+            return False
         try:
             _LOGGER.debug("Calling SystemReboot")
-            ret = await self._camera.devicemgmt.SystemReboot()
+            ret = await devicemgmt.SystemReboot()
             _LOGGER.debug("Camera '%s' Reboot command returned '%s'", self._name, ret)
+            return True
         except exceptions.ONVIFError as err:
             _LOGGER.error(
                 "Couldn't reboot the camera '%s', please verify "
@@ -686,31 +1043,100 @@ class ONVIFHassCamera(Camera):
                 self._name,
                 err,
             )
+            return False
 
     async def async_added_to_hass(self):
         """Handle entity addition to hass."""
         _LOGGER.debug("Camera '%s' added to hass", self._name)
-        if ONVIF_DATA not in self.hass.data:
-            self.hass.data[ONVIF_DATA] = {}
-            self.hass.data[ONVIF_DATA][ENTITIES] = []
-        self.hass.data[ONVIF_DATA][ENTITIES].append(self)
+        self.hass.data.setdefault(ONVIF_DATA, {}).setdefault(ENTITIES, []).append(
+            self
+        )
+
+        if self._snapshot_refresh_interval:
+            self._snapshot_cache = get_snapshot_cache(
+                self.hass, self._snapshot_cache_size * 1024 * 1024
+            )
+            self._snapshot_last_request = time.monotonic()
+            interval = self._snapshot_refresh_interval.total_seconds()
+            offset = self._snapshot_cache.stagger_offset(interval)
+            _LOGGER.debug(
+                "Refreshing snapshots of camera '%s' every %ss, starting in %.1fs",
+                self._name,
+                interval,
+                offset,
+            )
+            self._snapshot_unsub = async_call_later(
+                self.hass, offset, self._async_start_snapshot_refresher
+            )
+
+    async def async_will_remove_from_hass(self):
+        """Handle entity removal from hass."""
+        if self._snapshot_unsub is not None:
+            self._snapshot_unsub()
+            self._snapshot_unsub = None
+        if self._snapshot_cache is not None:
+            self._snapshot_cache.evict(self.entity_id)
+        entities = self.hass.data.get(ONVIF_DATA, {}).get(ENTITIES, [])
+        if self in entities:
+            entities.remove(self)
+
+    async def _async_start_snapshot_refresher(self, now):
+        """Start the periodic snapshot refresh after the staggered delay."""
+        self._snapshot_unsub = async_track_time_interval(
+            self.hass, self._async_refresh_snapshot, self._snapshot_refresh_interval
+        )
+        await self._async_refresh_snapshot(now)
+
+    async def _async_refresh_snapshot(self, now):
+        """Capture a fresh snapshot into the cache unless the camera is idle."""
+        if self._snapshot_refreshing:
+            return
+        if time.monotonic() - self._snapshot_last_request > SNAPSHOT_IDLE_TIMEOUT:
+            self._snapshot_cache.evict(self.entity_id)
+            return
+
+        self._snapshot_refreshing = True
+        try:
+            image = await self._async_capture_image()
+            if image is not None:
+                self._snapshot_cache.put(self.entity_id, image)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug(
+                "Couldn't refresh snapshot of camera '%s'. Error: %s", self._name, err
+            )
+        finally:
+            self._snapshot_refreshing = False
 
+    @traced("camera_image", failed=lambda image: image is None)
     async def async_camera_image(self):
         """Return a still image response from the camera."""
+        if self._snapshot_cache is not None:
+            self._snapshot_last_request = time.monotonic()
+            image = self._snapshot_cache.get(
+                self.entity_id, 2 * self._snapshot_refresh_interval.total_seconds()
+            )
+            if image is not None:
+                return image
+
+        image = await self._async_capture_image()
+        if self._snapshot_cache is not None and image is not None:
+            self._snapshot_cache.put(self.entity_id, image)
+        return image
+
+    @traced("snapshot", failed=lambda image: image is None)
+    async def _async_capture_image(self):
+        """Capture a still image from the camera stream through the snapshot queue."""
 
         _LOGGER.debug("Retrieving image from camera '%s'", self._name)
 
-        ffmpeg = ImageFrame(self.hass.data[DATA_FFMPEG].binary, loop=self.hass.loop)
+        queue = get_snapshot_queue(self.hass, self.hass.data[DATA_FFMPEG].binary)
 
-        image = await asyncio.shield(
-            ffmpeg.get_image(
-                self._input_uri,
-                output_format=IMAGE_JPEG,
-                extra_cmd=self._ffmpeg_arguments,
-            )
+        image = await queue.async_get_image(
+            self._input_uri, extra_cmd=self._ffmpeg_arguments
         )
         return image
 
+    @traced("mjpeg_stream")
     async def handle_async_mjpeg_stream(self, request):
         """Generate an HTTP MJPEG stream from the camera."""
         _LOGGER.debug("Handling mjpeg stream from camera '%s'", self._name)
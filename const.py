@@ -20,10 +20,26 @@ RTSP_TRANSPORT_RTSP = "RTSP"
 DEFAULT_PROFILE_IDX = 0
 CONF_CONTINUOUS_TIMEOUT_COMPLIANCE = "continuous_timeout_compliance"
 
+CONF_SNAPSHOT_REFRESH_INTERVAL = "snapshot_refresh_interval"
+CONF_SNAPSHOT_CACHE_SIZE = "snapshot_cache_size"
+DEFAULT_SNAPSHOT_CACHE_SIZE = 32
+SNAPSHOT_IDLE_TIMEOUT = 300
+SNAPSHOT_QUEUE_SIZE = 64
+SNAPSHOT_TIMEOUT = 15
+SNAPSHOT_STATS_INTERVAL = 60
+
 CONF_PROFILE_IDX = "profile"
 CONF_PRESETS_INPUT_SELECT_NAME = "presets_list_name"
 
 SERVICE_PTZ_ADVANCED_MOVE = "onvif_ptz_advanced_move"
+SERVICE_PTZ_BATCH_MOVE = "onvif_ptz_batch_move"
+EVENT_PTZ_BATCH_MOVE = "onvif_ptz_batch_move_result"
+ATTR_MOVES = "moves"
+ATTR_RESULTS = "results"
+ATTR_OUTCOME = "outcome"
+OUTCOME_OK = "ok"
+OUTCOME_FAILED = "failed"
+OUTCOME_NOT_FOUND = "not_found"
 SERVICE_PTZ_MOVE = "onvif_ptz_move"
 SERVICE_ONVIF_CMD_REBOOT = "onvif_cmd_reboot"
 ATTR_MOVE_MODE = "move_mode"
@@ -40,6 +56,7 @@ ATTR_ZOOM = "zoom"
 ATTR_DISTANCE = "distance"
 ATTR_SPEED = "speed"
 ATTR_CONTINUOUS_DURATION = "continuous_timeout"
+ATTR_NORMALIZED = "normalized"
 DIR_UP = "UP"
 DIR_DOWN = "DOWN"
 DIR_LEFT = "LEFT"
@@ -58,5 +75,18 @@ GOTO_HOME = "GotoHomePosition"
 SET_HOME = "SetHomePosition"
 ONVIF_DATA = "onvif"
 ENTITIES = "entities"
+SNAPSHOT_CACHE = "snapshot_cache"
+TRACER = "tracer"
+SNAPSHOT_QUEUE = "snapshot_queue"
 
 INFO_STREAM_URI = "onvif_stream_uri"
+
+CONF_TRACING = "tracing"
+TRACE_BUFFER_SIZE = 2000
+SERVICE_TRACE_EXPORT = "onvif_trace_export"
+SERVICE_PROFILE = "onvif_profile"
+ATTR_FORMAT = "format"
+ATTR_DURATION = "duration"
+TRACE_FORMAT_JSON = "json"
+TRACE_FORMAT_CHROME = "chrome"
+DEFAULT_PROFILE_DURATION = 10
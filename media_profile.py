@@ -0,0 +1,102 @@
+"""
+media_profile.py
+compact record of the onvif media profile used by a camera
+"""
+
+
+def release_service(camera, name, service):
+    """
+    Drop the references an ONVIFCamera keeps to a service client.
+
+    create_*_service stores the client on the camera object itself, so
+    forgetting our own reference alone doesn't free it.
+    """
+    if service is None:
+        return
+    if getattr(camera, name, None) is service:
+        setattr(camera, name, None)
+    services = getattr(camera, "services", None) or {}
+    for key in [key for key, value in services.items() if value is service]:
+        del services[key]
+
+
+def _range(space):
+    """Return (min, max) of a zeep FloatRange, or None."""
+    if space is None:
+        return None
+    return (float(space.Min), float(space.Max))
+
+
+def _generic_position(space):
+    """Return True if space is a generic position space."""
+    if space is None:
+        return False
+    return (getattr(space, "URI", None) or "").endswith("PositionGenericSpace")
+
+
+class OnvifProfile:
+    """
+    Fields of a media profile needed after setup.
+
+    GetProfiles returns large zeep object graphs, only these values are kept
+    so the SOAP objects can be released once the camera is initialized.
+    """
+
+    __slots__ = (
+        "token",
+        "name",
+        "encoding",
+        "width",
+        "height",
+        "stream_uri",
+        "ptz_token",
+        "pan_range",
+        "tilt_range",
+        "zoom_range",
+    )
+
+    def __init__(self, token, name=None):
+        """Initialize an empty profile record."""
+        self.token = token
+        self.name = name
+        self.encoding = None
+        self.width = None
+        self.height = None
+        self.stream_uri = None
+        self.ptz_token = None
+        self.pan_range = None
+        self.tilt_range = None
+        self.zoom_range = None
+
+    @classmethod
+    def from_zeep(cls, profile):
+        """Build a record from a GetProfiles profile object."""
+        record = cls(profile.token, getattr(profile, "Name", None))
+
+        encoder = getattr(profile, "VideoEncoderConfiguration", None)
+        if encoder is not None:
+            record.encoding = encoder.Encoding
+            if encoder.Resolution is not None:
+                record.width = encoder.Resolution.Width
+                record.height = encoder.Resolution.Height
+
+        ptz = getattr(profile, "PTZConfiguration", None)
+        if ptz is not None:
+            record.ptz_token = ptz.token
+            # Only limits given in the generic position space match the
+            # values sent by moves.
+            pan_tilt = ptz.PanTiltLimits.Range if ptz.PanTiltLimits else None
+            if _generic_position(pan_tilt):
+                record.pan_range = _range(pan_tilt.XRange)
+                record.tilt_range = _range(pan_tilt.YRange)
+            zoom = ptz.ZoomLimits.Range if ptz.ZoomLimits else None
+            if _generic_position(zoom):
+                record.zoom_range = _range(zoom.XRange)
+
+        return record
+
+    def __repr__(self):
+        """Return the representation of the record."""
+        return "<OnvifProfile {} {} {}x{}>".format(
+            self.token, self.encoding, self.width, self.height
+        )
@@ -0,0 +1,138 @@
+"""
+ptz.py
+ptz space ranges of an onvif profile, used to check moves locally
+"""
+from .const import ABSOLUTE_MOVE, CONTINUOUS_MOVE, RELATIVE_MOVE, STOP_MOVE
+
+_SPACES = (
+    (CONTINUOUS_MOVE, "ContinuousPanTiltVelocitySpace", "ContinuousZoomVelocitySpace"),
+    (RELATIVE_MOVE, "RelativePanTiltTranslationSpace", "RelativeZoomTranslationSpace"),
+    (ABSOLUTE_MOVE, "AbsolutePanTiltPositionSpace", "AbsoluteZoomPositionSpace"),
+)
+
+
+GENERIC_SPACE = "GenericSpace"
+GENERIC_SPEED_SPACE = "GenericSpeedSpace"
+
+
+def _generic(spaces, suffix=GENERIC_SPACE):
+    """
+    Return the generic space of a list of spaces, or None.
+
+    Moves are sent without a space URI, so the camera reads their values in
+    the generic spaces whatever order it lists its spaces in.
+    """
+    for space in spaces or ():
+        if (getattr(space, "URI", None) or "").endswith(suffix):
+            return space
+    return None
+
+
+def _range(space, axis="XRange"):
+    """Return (min, max) of an axis of a zeep space, or None."""
+    axis_range = getattr(space, axis, None) if space is not None else None
+    if axis_range is None:
+        return None
+    return (float(axis_range.Min), float(axis_range.Max))
+
+
+def _clamp(value, bounds):
+    """Return value limited to bounds."""
+    if bounds is None:
+        return value
+    return min(max(value, bounds[0]), bounds[1])
+
+
+def _denormalize(value, bounds):
+    """Map value from [-1, 1] onto bounds."""
+    if bounds is None:
+        return value
+    return bounds[0] + (value + 1) / 2 * (bounds[1] - bounds[0])
+
+
+def _scale(value, bounds):
+    """Map value from [-1, 1] onto bounds keeping 0 as no movement."""
+    if bounds is None:
+        return value
+    if not bounds[0] <= 0 <= bounds[1]:
+        return _denormalize(value, bounds)
+    return value * bounds[1] if value >= 0 else -value * bounds[0]
+
+
+class PtzRanges:
+    """Pan, tilt and zoom ranges for each move mode and for speeds."""
+
+    __slots__ = ("spaces", "speed")
+
+    def __init__(self):
+        """Initialize ranges without any supported move mode."""
+        self.spaces = {}
+        self.speed = (None, None, None)
+
+    @classmethod
+    def from_zeep(cls, options, profile=None):
+        """
+        Build ranges from a GetConfigurationOptions response.
+
+        Absolute positions are further limited by the PanTiltLimits and
+        ZoomLimits of the profile PTZ configuration when it has some in the
+        generic space. A mode listing only non generic spaces is supported
+        but its values aren't checked.
+        """
+        ranges = cls()
+        spaces = options.Spaces
+        for move_mode, pan_tilt_name, zoom_name in _SPACES:
+            pan_tilt_spaces = getattr(spaces, pan_tilt_name, None)
+            zoom_spaces = getattr(spaces, zoom_name, None)
+            if not pan_tilt_spaces and not zoom_spaces:
+                continue
+            pan_tilt = _generic(pan_tilt_spaces)
+            zoom = _generic(zoom_spaces)
+            ranges.spaces[move_mode] = (
+                _range(pan_tilt, "XRange"),
+                _range(pan_tilt, "YRange"),
+                _range(zoom, "XRange"),
+            )
+
+        if profile is not None and ABSOLUTE_MOVE in ranges.spaces:
+            pan, tilt, zoom = ranges.spaces[ABSOLUTE_MOVE]
+            ranges.spaces[ABSOLUTE_MOVE] = (
+                profile.pan_range or pan,
+                profile.tilt_range or tilt,
+                profile.zoom_range or zoom,
+            )
+
+        pan_tilt_speed = _range(
+            _generic(getattr(spaces, "PanTiltSpeedSpace", None), GENERIC_SPEED_SPACE)
+        )
+        zoom_speed = _range(
+            _generic(getattr(spaces, "ZoomSpeedSpace", None), GENERIC_SPEED_SPACE)
+        )
+        ranges.speed = (pan_tilt_speed, pan_tilt_speed, zoom_speed)
+        return ranges
+
+    def supports(self, move_mode):
+        """Return True if the camera provides a space for move_mode."""
+        return move_mode == STOP_MOVE or move_mode in self.spaces
+
+    def apply(self, move_mode, vector, normalized=False):
+        """
+        Return vector fitted into the ranges of move_mode.
+
+        With normalized, vector components are given in [-1, 1] and mapped
+        onto the camera ranges, otherwise they are clamped to them. Velocities
+        and translations are scaled on each side of 0 so that 0 still means
+        no movement, positions are mapped linearly over the whole range.
+        """
+        bounds = self.spaces.get(move_mode, (None, None, None))
+        if normalized:
+            mapping = _denormalize if move_mode == ABSOLUTE_MOVE else _scale
+            vector = tuple(
+                mapping(_clamp(value, (-1.0, 1.0)), axis)
+                for value, axis in zip(vector, bounds)
+            )
+        return tuple(_clamp(value, axis) for value, axis in zip(vector, bounds))
+
+    def apply_speed(self, vector):
+        """Return speed vector clamped to the speed ranges."""
+        return tuple(_clamp(value, axis) for value, axis in zip(vector, self.speed))
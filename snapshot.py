@@ -0,0 +1,87 @@
+"""
+snapshot.py
+shared in-memory snapshot cache for onvif cameras
+"""
+from collections import OrderedDict
+import logging
+import time
+
+from .const import ONVIF_DATA, SNAPSHOT_CACHE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fractional part of the golden ratio, spreads any number of start offsets
+# evenly over an interval without knowing the number of cameras upfront.
+_GOLDEN_RATIO_FRACTION = 0.6180339887498949
+
+
+class SnapshotCache:
+    """LRU of the latest JPEG of each camera, bounded by a global byte limit."""
+
+    def __init__(self, max_bytes):
+        """Initialize an empty cache."""
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._slots = 0
+
+    @property
+    def size(self):
+        """Return the number of bytes held by the cache."""
+        return self._size
+
+    def __len__(self):
+        """Return the number of cached cameras."""
+        return len(self._entries)
+
+    def get(self, key, max_age):
+        """Return the image of key if younger than max_age seconds, else None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stamp, image = entry
+        if time.monotonic() - stamp > max_age:
+            return None
+        self._entries.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        """
+        Store image for key, evicting least recently used cameras if needed.
+
+        A missing image (failed capture) keeps the previous one of key.
+        """
+        if image is None:
+            return
+        self.evict(key)
+        if len(image) > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic(), image)
+        self._size += len(image)
+        while self._size > self.max_bytes:
+            old_key, (_, old_image) = self._entries.popitem(last=False)
+            self._size -= len(old_image)
+            _LOGGER.debug("Snapshot of '%s' evicted from cache", old_key)
+
+    def evict(self, key):
+        """Drop the image of key from the cache."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def stagger_offset(self, interval):
+        """Return the start delay of the next refresher within interval."""
+        offset = interval * ((self._slots * _GOLDEN_RATIO_FRACTION) % 1)
+        self._slots += 1
+        return offset
+
+
+def get_snapshot_cache(hass, max_bytes):
+    """Return the cache shared by every camera, creating it on first use."""
+    data = hass.data.setdefault(ONVIF_DATA, {})
+    cache = data.get(SNAPSHOT_CACHE)
+    if cache is None:
+        cache = data[SNAPSHOT_CACHE] = SnapshotCache(max_bytes)
+    elif max_bytes > cache.max_bytes:
+        cache.max_bytes = max_bytes
+    return cache
@@ -0,0 +1,184 @@
+"""
+snapshot_queue.py
+bounded snapshot concurrency shared by onvif cameras
+"""
+import asyncio
+from datetime import timedelta
+import logging
+import os
+import time
+
+from haffmpeg.tools import IMAGE_JPEG, ImageFrame
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    ONVIF_DATA,
+    SNAPSHOT_QUEUE,
+    SNAPSHOT_QUEUE_SIZE,
+    SNAPSHOT_STATS_INTERVAL,
+    SNAPSHOT_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SnapshotQueue:
+    """
+    Bound how many snapshot captures run at once.
+
+    Jobs wait in a queue served by a fixed number of runner tasks. Every
+    capture still starts its own ffmpeg process, the runners only cap how
+    many of them run concurrently so latency stays predictable under load.
+    """
+
+    def __init__(self, hass, binary, size, queue_size, timeout):
+        """Initialize the queue, runners are started on the first job."""
+        self._hass = hass
+        self._binary = binary
+        self._size = size
+        self._timeout = timeout
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._runners = []
+        self._started = None
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._busy_time = 0.0
+        self._logged_jobs = 0
+        self._unsub_stats = None
+
+    @property
+    def stats(self):
+        """Return throughput counters of the queue."""
+        uptime = time.monotonic() - self._started if self._started else 0
+        done = self._completed + self._failed
+        return {
+            "runners": self._size,
+            "queued": self._queue.qsize(),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+            "throughput": self._completed / uptime if uptime else 0.0,
+            "average_time": self._busy_time / done if done else 0.0,
+        }
+
+    def _start(self):
+        """Spawn the runner tasks."""
+        self._started = time.monotonic()
+        for _ in range(self._size):
+            self._runners.append(self._hass.loop.create_task(self._async_runner()))
+        self._unsub_stats = async_track_time_interval(
+            self._hass,
+            self._async_log_stats,
+            timedelta(seconds=SNAPSHOT_STATS_INTERVAL),
+        )
+        _LOGGER.debug("Started %d snapshot runners", self._size)
+
+    async def _async_log_stats(self, now):
+        """Log the throughput counters when jobs ran since the last log."""
+        stats = self.stats
+        jobs = stats["completed"] + stats["failed"] + stats["rejected"]
+        if jobs == self._logged_jobs:
+            return
+        self._logged_jobs = jobs
+        _LOGGER.debug("Snapshot queue stats: %s", stats)
+
+    async def async_stop(self, event=None):
+        """Cancel the runners and fail pending jobs."""
+        if self._unsub_stats is not None:
+            self._unsub_stats()
+            self._unsub_stats = None
+        for runner in self._runners:
+            runner.cancel()
+        self._runners = []
+        while not self._queue.empty():
+            future = self._queue.get_nowait()[0]
+            if not future.done():
+                future.set_result(None)
+
+    async def async_get_image(self, input_source, extra_cmd=None):
+        """
+        Return a JPEG snapshot of input_source, or None.
+
+        Jobs wait in a bounded queue for a free runner. A job is rejected when
+        the queue is full and given up when no image is produced within the
+        queue timeout, so callers never wait more than that. Runners only get
+        the time left before that deadline and skip jobs already given up.
+        """
+        if not self._runners:
+            self._start()
+
+        future = self._hass.loop.create_future()
+        deadline = time.monotonic() + self._timeout
+        try:
+            self._queue.put_nowait((future, deadline, input_source, extra_cmd))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            _LOGGER.warning(
+                "Snapshot queue is full, dropping request for %s", input_source
+            )
+            return None
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self._timeout)
+        except asyncio.TimeoutError:
+            # Mark the job abandoned so a runner doesn't pick it up later.
+            future.cancel()
+            self._timed_out += 1
+            _LOGGER.warning("Snapshot request timed out after %ss", self._timeout)
+            return None
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    async def _async_runner(self):
+        """Run snapshot jobs from the queue until cancelled."""
+        ffmpeg = ImageFrame(self._binary, loop=self._hass.loop)
+        while True:
+            future, deadline, input_source, extra_cmd = await self._queue.get()
+            try:
+                start = time.monotonic()
+                if future.done() or start >= deadline:
+                    # The caller already gave up waiting.
+                    continue
+                image = await ffmpeg.get_image(
+                    input_source,
+                    output_format=IMAGE_JPEG,
+                    extra_cmd=extra_cmd,
+                    timeout=deadline - start,
+                )
+                self._busy_time += time.monotonic() - start
+                if image:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                if not future.done():
+                    future.set_result(image)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_result(None)
+                raise
+            except Exception as err:  # pylint: disable=broad-except
+                self._busy_time += time.monotonic() - start
+                self._failed += 1
+                _LOGGER.debug("Snapshot job failed. Error: %s", err)
+                if not future.done():
+                    future.set_result(None)
+            finally:
+                self._queue.task_done()
+
+
+def get_snapshot_queue(hass, binary):
+    """Return the queue shared by every camera, creating it on first use."""
+    data = hass.data.setdefault(ONVIF_DATA, {})
+    queue = data.get(SNAPSHOT_QUEUE)
+    if queue is None:
+        queue = data[SNAPSHOT_QUEUE] = SnapshotQueue(
+            hass, binary, os.cpu_count() or 1, SNAPSHOT_QUEUE_SIZE, SNAPSHOT_TIMEOUT
+        )
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, queue.async_stop)
+    return queue
@@ -0,0 +1,223 @@
+"""
+tracing.py
+opt-in timed spans and cProfile capture for the onvif component
+"""
+import asyncio
+import cProfile
+from collections import deque
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import time
+
+from .const import (
+    ONVIF_DATA,
+    OUTCOME_FAILED,
+    OUTCOME_OK,
+    TRACE_BUFFER_SIZE,
+    TRACE_FORMAT_CHROME,
+    TRACER,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Span:
+    """A timed operation on a camera."""
+
+    __slots__ = ("camera", "operation", "start", "duration", "outcome")
+
+    def __init__(self, camera, operation):
+        """Initialize a span starting now."""
+        self.camera = camera
+        self.operation = operation
+        self.start = time.time()
+        self.duration = None
+        self.outcome = OUTCOME_OK
+
+    def as_dict(self):
+        """Return the span as a dict."""
+        return {
+            "camera": self.camera,
+            "operation": self.operation,
+            "start": self.start,
+            "duration": self.duration,
+            "outcome": self.outcome,
+        }
+
+
+class _SpanContext:
+    """Record a span in the tracer buffer when leaving the context."""
+
+    __slots__ = ("_buffer", "_span", "_perf_start")
+
+    def __init__(self, buffer, camera, operation):
+        self._buffer = buffer
+        self._span = Span(camera, operation)
+        self._perf_start = None
+
+    def __enter__(self):
+        self._perf_start = time.perf_counter()
+        return self._span
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._span.duration = time.perf_counter() - self._perf_start
+        if exc_type is not None:
+            self._span.outcome = "error: {}".format(exc_type.__name__)
+        self._buffer.append(self._span)
+        return False
+
+
+class _NullContext:
+    """Context doing nothing, returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return Span(None, None)
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class Tracer:
+    """Keep the latest spans in a bounded ring buffer."""
+
+    def __init__(self, size=TRACE_BUFFER_SIZE):
+        """Initialize a disabled tracer."""
+        self.enabled = False
+        self._spans = deque(maxlen=size)
+        self._profiling = False
+
+    def span(self, camera, operation):
+        """Return a context timing operation on camera while enabled."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _SpanContext(self._spans, camera, operation)
+
+    def export_json(self):
+        """Return the recorded spans as a JSON list."""
+        return json.dumps([span.as_dict() for span in self._spans], indent=1)
+
+    def export_chrome(self):
+        """Return the recorded spans in Chrome trace event format."""
+        pid = os.getpid()
+        threads = {}
+        events = []
+        for span in self._spans:
+            tid = threads.setdefault(span.camera, len(threads) + 1)
+            events.append(
+                {
+                    "name": span.operation,
+                    "cat": "onvif",
+                    "ph": "X",
+                    "ts": span.start * 1e6,
+                    "dur": span.duration * 1e6,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"outcome": span.outcome},
+                }
+            )
+        for camera, tid in threads.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": camera or "onvif"},
+                }
+            )
+        return json.dumps({"traceEvents": events})
+
+    def export(self, trace_format):
+        """Return the recorded spans in trace_format."""
+        if trace_format == TRACE_FORMAT_CHROME:
+            return self.export_chrome()
+        return self.export_json()
+
+    async def async_profile(self, duration):
+        """
+        Profile the event loop for duration seconds.
+
+        cProfile only follows the thread it is enabled on, so this captures the
+        work done on the event loop. Returns the profiler, or None if a capture
+        is already running.
+        """
+        if self._profiling:
+            return None
+        self._profiling = True
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            await asyncio.sleep(duration)
+        finally:
+            profiler.disable()
+            self._profiling = False
+        return profiler
+
+    @staticmethod
+    def format_profile(profiler, path):
+        """Dump profiler to path and return a summary of this component."""
+        profiler.dump_stats(path)
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats("cumulative").print_stats(
+            re.escape(os.path.dirname(os.path.abspath(__file__))), 30
+        )
+        return output.getvalue()
+
+
+def write_file(path, data):
+    """Write data to path, run in the executor."""
+    with open(path, "w") as file:
+        file.write(data)
+
+
+def get_tracer(hass, enable=False):
+    """Return the tracer shared by every camera, creating it on first use."""
+    data = hass.data.setdefault(ONVIF_DATA, {})
+    tracer = data.get(TRACER)
+    if tracer is None:
+        tracer = data[TRACER] = Tracer()
+    if enable and not tracer.enabled:
+        _LOGGER.debug("Enabling ONVIF tracing")
+        tracer.enabled = True
+    return tracer
+
+
+def _returned_false(result):
+    """Return True if a traced method reported a failure."""
+    return result is False
+
+
+def traced(operation, failed=_returned_false):
+    """
+    Record a span around a coroutine method of a camera.
+
+    The camera must have _tracer and name attributes. The span is recorded
+    as failed when failed(result) is true, by default when the method
+    returns False.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if not self._tracer.enabled:  # pylint: disable=protected-access
+                return await func(self, *args, **kwargs)
+            with self._tracer.span(self.name, operation) as span:  # pylint: disable=protected-access
+                result = await func(self, *args, **kwargs)
+                if failed(result):
+                    span.outcome = OUTCOME_FAILED
+                return result
+
+        return wrapper
+
+    return decorator